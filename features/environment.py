@@ -18,7 +18,11 @@ def before_all(context):
         context.driver = get_firefox()
     else:
         context.driver = get_chrome()
-    context.driver.implicitly_wait(context.wait_seconds)
+    # No implicit wait: steps that need to wait use an explicit WebDriverWait,
+    # so negative assertions don't block for the full timeout
+    context.driver.implicitly_wait(0)
+    # WebElements looked up by id, reused across steps (see web_steps.py)
+    context._element_cache = {}
     context.config.setup_logging()
 
 
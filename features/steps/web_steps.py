@@ -25,18 +25,142 @@ For information on Waiting until elements are present in the HTML see:
     https://selenium-python.readthedocs.io/waits.html
 """
 import logging
+import warnings
+from functools import lru_cache
+from types import MappingProxyType
 from behave import when, then
+from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import Select, WebDriverWait
 from selenium.webdriver.support import expected_conditions
 
 ID_PREFIX = 'product_'
+# WebDriverWait polls every 0.5s by default which adds up to half a
+# second to every wait after the condition is already true
+POLL_SECONDS = 0.15
+
+# Map the field_name (column header) to its 0-indexed column in the HTML table.
+# The order matches the table built in static/js/rest_api.js
+# IMPORTANT: Adjust these indices if your table columns change!
+_COLUMN_MAP = MappingProxyType({
+    "Id": 0,
+    "Name": 1,
+    "Description": 2,
+    "Available": 3,
+    "Category": 4,
+    "Price": 5
+})
+
+# Sets the value of an input, given either the element or its id, and
+# fires the events a user typing would. Returns false if there is no such id
+_SET_VALUE_JS = """
+const element = typeof arguments[0] === 'string' ? document.getElementById(arguments[0]) : arguments[0];
+if (!element) { return false; }
+element.value = arguments[1];
+element.dispatchEvent(new Event('input', {bubbles: true}));
+element.dispatchEvent(new Event('change', {bubbles: true}));
+return true;
+"""
+
+# Both table scripts start from the data rows of the search results table:
+# the <tbody> rows, or every row outside <thead> if the table has no <tbody>
+_DATA_ROWS_JS = """
+const table = document.querySelector('#search_results table');
+const hasBody = !table || table.tBodies.length > 0;
+const rows = !table ? [] : Array.from(
+    hasBody ? table.querySelectorAll('tbody > tr') : table.rows
+).filter(row => row.parentNode !== table.tHead);
+"""
+
+# Returns [has <tbody>, data row count]
+_ROW_COUNT_JS = _DATA_ROWS_JS + """
+return [hasBody, rows.length];
+"""
+
+# Returns [has <tbody>, data row count, cell count of the row, text of the cell]
+# for the search results table given a 0-indexed row and column
+_CELL_TEXT_JS = _DATA_ROWS_JS + """
+const row = rows[arguments[0]];
+const cell = row ? row.cells[arguments[1]] : undefined;
+return [hasBody, rows.length, row ? row.cells.length : 0, cell ? cell.innerText : null];
+"""
+
+
+def _wait(context):
+    """ Returns an explicit wait that polls at POLL_SECONDS """
+    return WebDriverWait(
+        context.driver,
+        context.wait_seconds,
+        poll_frequency=POLL_SECONDS,
+        ignored_exceptions=(StaleElementReferenceException,)
+    )
+
+
+@lru_cache(maxsize=256)
+def _eid(element_name):
+    """ Returns the html id of the field named element_name """
+    return ID_PREFIX + element_name.lower().replace(' ', '_')
+
+@lru_cache(maxsize=256)
+def _bid(button):
+    """ Returns the html id of the button labelled button """
+    return button.lower().replace(' ', '_') + '-btn'
+
+
+##################################################################
+# Element cache: every find_element is a round trip to the
+# WebDriver server, so element references are kept in
+# context._element_cache by id and reused until the page changes
+##################################################################
+def _get(context, element_id):
+    """ Returns the element with element_id, fetching it only once """
+    element = context._element_cache.get(element_id)
+    if element is None:
+        element = _wait(context).until(
+            expected_conditions.presence_of_element_located((By.ID, element_id))
+        )
+        context._element_cache[element_id] = element
+    return element
+
+def _use(context, element_id, action):
+    """ Calls action with the cached element, refetching it once if stale """
+    try:
+        return action(_get(context, element_id))
+    except StaleElementReferenceException:
+        context._element_cache.pop(element_id, None)
+        return action(_get(context, element_id))
+
+def _set_value(driver, element, text):
+    """ Replaces the value of an input in one WebDriver command (vs clear + send_keys) """
+    driver.execute_script(_SET_VALUE_JS, element, text)
+
+def _set_value_by_id(context, element_id, text):
+    """ Looks up and sets a field in one command, waiting for it via _use() if it isn't on the page yet """
+    if not context.driver.execute_script(_SET_VALUE_JS, element_id, text):
+        _use(context, element_id, lambda element: _set_value(context.driver, element, text))
+
+def _safely_get_text(driver, by, selector):
+    """ Returns the text of an element, or '' if it is not on the page """
+    try:
+        return driver.find_element(by, selector).text
+    except NoSuchElementException:
+        return ''
+
+def _check_table_body(has_body):
+    """ Warns (once) when the results table isn't split into <thead>/<tbody> """
+    if not has_body:
+        warnings.warn("search_results table has no <tbody>, counting rows outside <thead> instead")
+
+def _clear_element_cache(context):
+    """ Forgets all cached elements (call when the page may have changed) """
+    context._element_cache.clear()
 
 
 @when('I visit the "Home Page"')
 def step_impl(context):
     """ Make a call to the base URL """
     context.driver.get(context.base_url)
+    _clear_element_cache(context)
     # Uncomment next line to take a screenshot of the web page
     # context.driver.save_screenshot('home_page.png')
 
@@ -47,54 +171,43 @@ def step_impl(context, message):
 
 @then('I should not see "{text_string}"')
 def step_impl(context, text_string):
-    element = context.driver.find_element(By.TAG_NAME, 'body')
-    assert(text_string not in element.text)
+    assert(text_string not in _safely_get_text(context.driver, By.TAG_NAME, 'body'))
 
 @when('I set the "{element_name}" to "{text_string}"')
 def step_impl(context, element_name, text_string):
-    element_id = ID_PREFIX + element_name.lower().replace(' ', '_')
-    element = context.driver.find_element(By.ID, element_id)
-    element.clear()
-    element.send_keys(text_string)
+    element_id = _eid(element_name)
+    _set_value_by_id(context, element_id, text_string)
 
 @when('I select "{text}" in the "{element_name}" dropdown')
 def step_impl(context, text, element_name):
-    element_id = ID_PREFIX + element_name.lower().replace(' ', '_')
-    element = Select(context.driver.find_element(By.ID, element_id))
-    element.select_by_visible_text(text)
+    element_id = _eid(element_name)
+    _use(context, element_id, lambda element: Select(element).select_by_visible_text(text))
 
 @then('I should see "{text}" in the "{element_name}" dropdown')
 def step_impl(context, text, element_name):
-    element_id = ID_PREFIX + element_name.lower().replace(' ', '_')
-    element = Select(context.driver.find_element(By.ID, element_id))
-    assert(element.first_selected_option.text == text)
+    element_id = _eid(element_name)
+    selected = _use(context, element_id, lambda element: Select(element).first_selected_option.text)
+    assert(selected == text)
 
 @then('the "{element_name}" field should be empty')
 def step_impl(context, element_name):
-    element_id = ID_PREFIX + element_name.lower().replace(' ', '_')
-    element = context.driver.find_element(By.ID, element_id)
-    assert(element.get_attribute('value') == u'')
+    element_id = _eid(element_name)
+    value = _use(context, element_id, lambda element: element.get_attribute('value'))
+    assert(value == u'')
 
 ##################################################################
 # These two function simulate copy and paste
 ##################################################################
 @when('I copy the "{element_name}" field')
 def step_impl(context, element_name):
-    element_id = ID_PREFIX + element_name.lower().replace(' ', '_')
-    element = WebDriverWait(context.driver, context.wait_seconds).until(
-        expected_conditions.presence_of_element_located((By.ID, element_id))
-    )
-    context.clipboard = element.get_attribute('value')
+    element_id = _eid(element_name)
+    context.clipboard = _use(context, element_id, lambda element: element.get_attribute('value'))
     logging.info('Clipboard contains: %s', context.clipboard)
 
 @when('I paste the "{element_name}" field')
 def step_impl(context, element_name):
-    element_id = ID_PREFIX + element_name.lower().replace(' ', '_')
-    element = WebDriverWait(context.driver, context.wait_seconds).until(
-        expected_conditions.presence_of_element_located((By.ID, element_id))
-    )
-    element.clear()
-    element.send_keys(context.clipboard)
+    element_id = _eid(element_name)
+    _set_value_by_id(context, element_id, context.clipboard)
 
 ##################################################################
 # This code works because of the following naming convention:
@@ -105,8 +218,10 @@ def step_impl(context, element_name):
 ##################################################################
 @when('I press the "{button}" button')
 def step_impl(context, button):
-    button_id = button.lower().replace(' ', '_') + '-btn'
+    button_id = _bid(button)
     context.driver.find_element(By.ID, button_id).click()
+    # the click may re-render the page so cached elements can't be trusted
+    _clear_element_cache(context)
 
 ##################################################################
 # This code works because of the following naming convention:
@@ -117,8 +232,8 @@ def step_impl(context, button):
 
 @then('I should see "{text_string}" in the "{element_name}" field')
 def step_impl(context, text_string, element_name):
-    element_id = ID_PREFIX + element_name.lower().replace(' ', '_')
-    found = WebDriverWait(context.driver, context.wait_seconds).until(
+    element_id = _eid(element_name)
+    found = _wait(context).until(
         expected_conditions.text_to_be_present_in_element_value(
             (By.ID, element_id),
             text_string
@@ -128,17 +243,13 @@ def step_impl(context, text_string, element_name):
 
 @when('I change "{element_name}" to "{text_string}"')
 def step_impl(context, element_name, text_string):
-    element_id = ID_PREFIX + element_name.lower().replace(' ', '_')
-    element = WebDriverWait(context.driver, context.wait_seconds).until(
-        expected_conditions.presence_of_element_located((By.ID, element_id))
-    )
-    element.clear()
-    element.send_keys(text_string)
+    element_id = _eid(element_name)
+    _set_value_by_id(context, element_id, text_string)
 
 @then('I should see the message "{message}"')
 def step_impl(context, message):
     """ Check the flash message """
-    found = WebDriverWait(context.driver, context.wait_seconds).until(
+    found = _wait(context).until(
         expected_conditions.text_to_be_present_in_element(
             (By.ID, 'flash_message'), # Assuming flash message is displayed in an element with ID 'flash_message'
             message
@@ -151,7 +262,7 @@ def step_impl(context, name):
     """ Check if the given name is in the search results table """
     # Assuming search results are within an element with ID 'search_results'
     # And we're looking for the name to be present anywhere within its text content
-    found = WebDriverWait(context.driver, context.wait_seconds).until(
+    found = _wait(context).until(
         expected_conditions.text_to_be_present_in_element(
             (By.ID, 'search_results'),
             name
@@ -162,79 +273,38 @@ def step_impl(context, name):
 @then('I should not see "{name}" in the results')
 def step_impl(context, name):
     """ Check if the given name is NOT in the search results table """
-    element = context.driver.find_element(By.ID, 'search_results')
-    # A more robust check might wait for the element to be visible/stable
-    # and then check its text. Using a simple assert for now.
-    assert(name not in element.text)
+    # implicit waits are off (see environment.py) so this returns immediately
+    assert(name not in _safely_get_text(context.driver, By.ID, 'search_results'))
 
 
 @then('the "{table_name}" table should contain {num_rows:d} rows')
 def step_impl(context, table_name, num_rows):
     """ Checks if the table has the correct number of data rows """
-    # Assuming 'search_results' is the ID of the table or a container for results
-    # and data rows are <tr> elements within it.
-    table_element = context.driver.find_element(By.ID, 'search_results')
-    # Find all 'tr' elements. This might include a header row.
-    rows = table_element.find_elements(By.TAG_NAME, 'tr')
-
-    # Heuristic: if the first row contains 'ID', it's likely a header.
-    # Adjust this based on your HTML structure (e.g., if you have <thead> and <tbody>,
-    # you might want to specifically find 'tbody tr').
-    actual_rows = len(rows)
-    if actual_rows > 0 and 'ID' in rows[0].text:
-        actual_rows -= 1 # Subtract 1 for the header row
-
-    assert(actual_rows == num_rows)
+    # Count the data rows in the browser: one WebDriver command, no header heuristic
+    has_body, actual_rows = context.driver.execute_script(_ROW_COUNT_JS)
+    _check_table_body(has_body)
+    assert actual_rows == num_rows, f"Expected {num_rows} rows but found {actual_rows}"
 
 
 @then('I should see "{value}" in the "{field_name}" field of the {row_num:d}{nth} row')
 def step_impl(context, value, field_name, row_num, nth):
     """ Checks a specific field (column) in a specific row of the search results table """
-    # Map the field_name (column header) to its corresponding 0-indexed column in the HTML table.
-    # IMPORTANT: Adjust these indices if your table columns change!
-    column_map = {
-        "Id": 0,
-        "Name": 1,
-        "Description": 2,
-        "Price": 3,
-        "Available": 4,
-        "Category": 5
-    }
-    column_index = column_map.get(field_name)
-
-    assert column_index is not None, f"Column '{field_name}' not found in column_map. Check your step definition."
-
-    # Get the search results table element
-    table_element = context.driver.find_element(By.ID, 'search_results')
-
-    # Get all the rows. If your table has a <thead> and <tbody>, you might do:
-    # data_rows = table_element.find_elements(By.CSS_SELECTOR, 'tbody tr')
-    # Otherwise, you need to account for the header row if present in the `tr` list.
-    all_rows = table_element.find_elements(By.TAG_NAME, 'tr')
-
-    # Adjust row_num (from Gherkin's 1-indexed) to 0-indexed for Python list.
-    # Also, account for a potential header row if it's included in `all_rows`.
-    # Assuming the first `tr` is a header row, then the first data row is `all_rows[1]`.
-    # So, for 1st row (row_num=1), we access all_rows[1]; for 2nd row (row_num=2), all_rows[2], etc.
-    # This means `row_num` directly corresponds to the index if we consider the header as index 0.
-    # If there's no header, it would be `row_num - 1`.
-    # Let's use a robust way to find the data row:
-    data_rows = []
-    if all_rows and 'ID' in all_rows[0].text: # Heuristic to detect header row
-        data_rows = all_rows[1:] # Skip header
-    else:
-        data_rows = all_rows # No header, all are data rows
+    column_index = _COLUMN_MAP.get(field_name)
 
-    assert len(data_rows) >= row_num, f"Not enough data rows in the table. Expected at least {row_num}, but found {len(data_rows)}."
+    assert column_index is not None, f"Column '{field_name}' not found in _COLUMN_MAP. Check your step definition."
 
-    # Get the specific row element (0-indexed)
-    row_element = data_rows[row_num - 1] # Adjust for 0-indexing of data_rows list
+    # Fetch the cell in one WebDriver command instead of a find for the
+    # table, the rows, the cells and then the text. Header rows in <thead>
+    # are skipped in the browser so row_num maps straight onto data rows
+    has_body, num_rows, num_cells, cell_text = context.driver.execute_script(
+        _CELL_TEXT_JS, row_num - 1, column_index
+    )
+    _check_table_body(has_body)
 
-    # Get all cells (td) in that row
-    cells = row_element.find_elements(By.TAG_NAME, 'td')
-    assert len(cells) > column_index, f"Column index {column_index} is out of bounds for row."
+    assert num_rows >= row_num, f"Not enough data rows in the table. Expected at least {row_num}, but found {num_rows}."
+    assert num_cells > column_index, f"Column index {column_index} is out of bounds for row."
 
-    cell_text = cells[column_index].text.strip() # Get text and remove leading/trailing whitespace
+    cell_text = cell_text.strip() # Remove leading/trailing whitespace
 
     # Special handling for numerical (Price) and boolean (Available) values
     if field_name == "Price":
@@ -0,0 +1,21 @@
+"""
+Shared helpers for the test suite
+"""
+import os
+from sqlalchemy import create_engine, text
+
+
+def worker_database_uri(base_uri: str) -> str:
+    """Returns base_uri pointed at a schema of its own for each pytest-xdist worker
+
+    Outside of xdist (e.g. nosetests) base_uri is returned unchanged
+    """
+    worker = os.getenv("PYTEST_XDIST_WORKER")
+    if not worker or not base_uri.startswith("postgresql"):
+        return base_uri
+    engine = create_engine(base_uri)
+    with engine.begin() as conn:
+        conn.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{worker}"'))
+    engine.dispose()
+    separator = "&" if "?" in base_uri else "?"
+    return f"{base_uri}{separator}options=-csearch_path%3D{worker}"
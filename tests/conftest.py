@@ -0,0 +1,16 @@
+"""
+pytest configuration for the test suite
+"""
+import os
+
+
+def pytest_configure(config):  # pylint: disable=unused-argument
+    """Creates the tables in the shared schema once, before any xdist worker starts
+
+    Importing service runs create_all() against the default schema. Without
+    this every xdist worker would do that at the same time and on an empty
+    database the losers fail with a duplicate type/table error and exit
+    """
+    if os.getenv("PYTEST_XDIST_WORKER"):
+        return
+    import service  # noqa: F401 pylint: disable=import-outside-toplevel,unused-import
@@ -19,6 +19,9 @@ Test cases can be run with:
     nosetests
     coverage report -m
 
+or in parallel, each worker using its own database schema:
+    pytest -n auto tests
+
 While debugging just these tests it's convenient to use this:
     nosetests --stop tests/test_models.py:TestProductModel
 
@@ -29,6 +32,7 @@ import unittest
 from decimal import Decimal
 from service.models import Product, Category, db, DataValidationError # Ensure DataValidationError is imported
 from service import app
+from tests import worker_database_uri
 from tests.factories import ProductFactory
 
 DATABASE_URI = os.getenv(
@@ -48,7 +52,7 @@ class TestProductModel(unittest.TestCase):
         """This runs once before the entire test suite"""
         app.config["TESTING"] = True
         app.config["DEBUG"] = False
-        app.config["SQLALCHEMY_DATABASE_URI"] = DATABASE_URI
+        app.config["SQLALCHEMY_DATABASE_URI"] = worker_database_uri(DATABASE_URI)
         app.logger.setLevel(logging.CRITICAL)
         Product.init_db(app)
 